@@ -6,41 +6,151 @@ including matching, validation, and entry creation.
 """
 
 import re
-from typing import Dict, List, Optional, Tuple, Any
+from functools import lru_cache
+from itertools import islice
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Set, Tuple, Any
 from dataclasses import dataclass
 from .config import (
     CONDITION_MAP, MATCHING_CONFIG, CARD_PROCESSING_CONFIG,
+    HIGH_CONFIDENCE_SCORE, MEDIUM_CONFIDENCE_SCORE, SCRYFALL_SCORE, SCORE_DIFFERENCE_THRESHOLD,
     DEFAULT_PRODUCT_LINE, DEFAULT_TCGPLAYER_ID, DEFAULT_SCRYFALL_ID,
-    DEFAULT_TOKEN_RARITY, DEFAULT_CONDITION, DEFAULT_QUANTITY
+    DEFAULT_TOKEN_RARITY, DEFAULT_CONDITION, DEFAULT_QUANTITY, TCGPLAYER_FIELDS
 )
 from .data_processing import (
-    normalize_key, find_best_match, enhance_matches_with_scryfall,
-    get_market_price, is_double_sided_candidate
+    normalize_key, match_key, find_best_match, enhance_matches_with_scryfall, prefetch_scryfall_fallbacks,
+    get_market_price, is_double_sided_candidate, names_may_match, prepare_card_entry
 )
 
+_COLLECTOR_PREFIX_RE = re.compile(r"^[A-Za-z\-]*")
+_TOKEN_SET_RE = re.compile(r"^T[A-Z0-9]+$")
+_DOUBLE_SIDED_RE = re.compile(r"double[-\s]?sided token", re.IGNORECASE)
+
+# Final condition string per (ManaBox condition, is foil), so rows need a single lookup
+_CONDITION_COMBINED: Dict[Tuple[str, bool], str] = {
+    **{(code, False): name for code, name in CONDITION_MAP.items()},
+    **{(code, True): name + " Foil" for code, name in CONDITION_MAP.items()},
+}
+_DEFAULT_CONDITIONS = (DEFAULT_CONDITION, DEFAULT_CONDITION + " Foil")
+
+# Field names resolved once; build_card_entry runs for every produced entry
+_MANABOX_QUANTITY_FIELD = CARD_PROCESSING_CONFIG.manabox_quantity_field
+_REF_SET_NAME_FIELD = CARD_PROCESSING_CONFIG.ref_set_name_field
+_REF_PRODUCT_NAME_FIELD = CARD_PROCESSING_CONFIG.ref_product_name_field
+_REF_NUMBER_FIELD = CARD_PROCESSING_CONFIG.ref_number_field
+_REF_RARITY_FIELD = CARD_PROCESSING_CONFIG.ref_rarity_field
+
+
+@lru_cache(maxsize=100_000)
+def _normalize_key_cached(card_name: str, set_name: str, condition: str,
+                          card_number: str) -> Tuple[Optional[Tuple], Optional[str]]:
+    """
+    Memoized normalize_key, since collections often repeat the same printing.
+    
+    Returns the normalized key and its flattened match key (see match_key).
+    """
+    normalized_result = normalize_key(card_name, set_name, condition, card_number)
+    if not normalized_result:
+        return None, None
+    return normalized_result, match_key(normalized_result[:4])
+
 
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
+class CardEntry:
+    """A TCGPlayer inventory row; attributes follow the TCGPLAYER_FIELDS order."""
+    tcgplayer_id: str
+    product_line: str
+    set_name: str
+    product_name: str
+    number: str
+    rarity: str
+    condition: str
+    add_to_quantity: int
+    tcg_marketplace_price: str
+    
+    def to_row(self) -> Tuple:
+        """Return the entry's values in TCGPLAYER_FIELDS order for CSV writing."""
+        return (self.tcgplayer_id, self.product_line, self.set_name, self.product_name,
+                self.number, self.rarity, self.condition, self.add_to_quantity,
+                self.tcg_marketplace_price)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the entry as a dict keyed by TCGPLAYER_FIELDS."""
+        return dict(zip(TCGPLAYER_FIELDS, self.to_row()))
+
+
+@dataclass(slots=True)
 class ProcessingState:
     """Centralized state management for card processing."""
-    given_up_cards: List[Dict[str, Any]]
-    scryfall_only_cards: List[Dict[str, Any]]
-    confirmed_matches: Dict[Tuple, Any]
+    given_up_buf: List[Optional[CardEntry]]
+    given_up_n: int
+    scryfall_only_buf: List[Optional[CardEntry]]
+    scryfall_only_n: int
+    confirmed_matches: Dict[str, Any]
     pending_confirmations: List[Tuple]
+    pending_keys: Set[str]
     
-    def __init__(self):
-        self.given_up_cards = []
-        self.scryfall_only_cards = []
+    def __init__(self, n_rows: int = 0):
         self.confirmed_matches = {}
         self.pending_confirmations = []
+        self.pending_keys = set()
+        self.reset(n_rows)
+    
+    def reset(self, n_rows: int = 0):
+        """Clear all state, presizing the output buffers for ``n_rows`` input rows."""
+        self.given_up_buf = [None] * n_rows
+        self.given_up_n = 0
+        self.scryfall_only_buf = [None] * n_rows
+        self.scryfall_only_n = 0
+        self.confirmed_matches.clear()
+        self.pending_confirmations.clear()
+        self.pending_keys.clear()
+    
+    @property
+    def given_up_cards(self) -> List[CardEntry]:
+        return self.given_up_buf[:self.given_up_n]
+    
+    @property
+    def scryfall_only_cards(self) -> List[CardEntry]:
+        return self.scryfall_only_buf[:self.scryfall_only_n]
+    
+    def add_given_up(self, entry: CardEntry):
+        if self.given_up_n < len(self.given_up_buf):
+            self.given_up_buf[self.given_up_n] = entry
+        else:
+            self.given_up_buf.append(entry)
+        self.given_up_n += 1
+    
+    def add_scryfall_only(self, entry: CardEntry):
+        if self.scryfall_only_n < len(self.scryfall_only_buf):
+            self.scryfall_only_buf[self.scryfall_only_n] = entry
+        else:
+            self.scryfall_only_buf.append(entry)
+        self.scryfall_only_n += 1
+    
+    def add_pending(self, normalized_key, matches, ref_data):
+        """Queue a match for manual confirmation, tracking its key for fast lookups."""
+        self.pending_confirmations.append((normalized_key, matches, ref_data))
+        self.pending_keys.add(match_key(normalized_key))
 
 
 # Global state instance
 state = ProcessingState()
 
+# Token sub-index of the reference database, rebuilt when the database changes
+_TOKEN_INDEX: Dict[str, Dict[Tuple, Dict[str, Any]]] = {}
+_token_index_guard: Tuple[int, int] = (0, 0)
+_token_entries: List[Tuple[Tuple, Dict[str, Any]]] = []
+
+# Fuzzy match results per normalized key, rebuilt when the database changes
+_MATCH_CACHE: Dict[Tuple, List[Tuple[Tuple, int]]] = {}
+_match_cache_guard: Tuple[int, int] = (0, 0)
+
 
 # =============================================================================
 # ENTRY BUILDING
@@ -51,7 +161,7 @@ def build_card_entry(
     condition: str,
     ref_row: Optional[Dict[str, Any]] = None,
     **overrides: str
-) -> Dict[str, Any]:
+) -> CardEntry:
     """
     Build card entries with flexible override support.
     
@@ -62,57 +172,64 @@ def build_card_entry(
         **overrides: Override values (product_name, set_name, number, rarity, tcgplayer_id)
     
     Returns:
-        Dictionary representing a TCGPlayer card entry
+        CardEntry representing a TCGPlayer card entry
     """
-    config = CARD_PROCESSING_CONFIG
-    
-    # Helper function to get value with fallbacks
-    def get_value(field_name: str, override: Optional[str] = None) -> str:
-        if override:
-            return override
-        if ref_row and field_name.startswith('ref_'):
-            return ref_row.get(getattr(config, field_name), "")
-        if field_name.startswith('manabox_'):
-            return manabox_row.get(getattr(config, field_name), "")
-        return ""
-    
-    return {
-        "TCGplayer Id": overrides.get('tcgplayer_id', DEFAULT_TCGPLAYER_ID),
-        "Product Line": DEFAULT_PRODUCT_LINE,
-        "Set Name": get_value('ref_set_name_field', overrides.get('set_name')),
-        "Product Name": get_value('ref_product_name_field', overrides.get('product_name')),
-        "Number": get_value('ref_number_field', overrides.get('number')),
-        "Rarity": get_value('ref_rarity_field', overrides.get('rarity')),
-        "Condition": condition,
-        "Add to Quantity": int(manabox_row.get(config.manabox_quantity_field, DEFAULT_QUANTITY)),
-        "TCG Marketplace Price": get_market_price(manabox_row, ref_row)
-    }
+    if ref_row:
+        set_name = overrides.get('set_name') or ref_row.get(_REF_SET_NAME_FIELD, "")
+        product_name = overrides.get('product_name') or ref_row.get(_REF_PRODUCT_NAME_FIELD, "")
+        number = overrides.get('number') or ref_row.get(_REF_NUMBER_FIELD, "")
+        rarity = overrides.get('rarity') or ref_row.get(_REF_RARITY_FIELD, "")
+    else:
+        set_name = overrides.get('set_name') or ""
+        product_name = overrides.get('product_name') or ""
+        number = overrides.get('number') or ""
+        rarity = overrides.get('rarity') or ""
+    
+    return CardEntry(
+        tcgplayer_id=overrides.get('tcgplayer_id', DEFAULT_TCGPLAYER_ID),
+        product_line=DEFAULT_PRODUCT_LINE,
+        set_name=set_name,
+        product_name=product_name,
+        number=number,
+        rarity=rarity,
+        condition=condition,
+        add_to_quantity=int(manabox_row.get(_MANABOX_QUANTITY_FIELD, DEFAULT_QUANTITY)),
+        tcg_marketplace_price=get_market_price(manabox_row, ref_row)
+    )
+
+
+def _finalize_match(manabox_row: Dict[str, Any], condition: str, ref_row: Dict[str, Any],
+                    suffix: str = "", **overrides: str) -> CardEntry:
+    """Build the entry for a matched reference row, appending the key suffix to its product name."""
+    return build_card_entry(manabox_row, condition, ref_row,
+                            product_name=ref_row.get("Product Name", "") + suffix, **overrides)
 
 
 # =============================================================================
 # MATCHING LOGIC
 # =============================================================================
 
-def confirm_and_iterate_match(normalized_key, matches, ref_data):
+def confirm_and_iterate_match(normalized_key, matches, ref_data, state: ProcessingState = state,
+                              joined_key: Optional[str] = None):
     """Simplified match confirmation logic."""
     best_match, best_score = matches[0]
     candidate = ref_data.get(best_match, {})
     second_best_score = matches[1][1] if len(matches) > 1 else 0
     is_scryfall_only = candidate.get("TCGplayer Id") == DEFAULT_SCRYFALL_ID
     
-    # Simplified auto-confirmation logic
+    # Simplified auto-confirmation logic (thresholds are module constants to keep this hot path cheap)
     should_confirm = (
-        (is_scryfall_only and best_score >= MATCHING_CONFIG.scryfall_score) or
-        (best_score >= MATCHING_CONFIG.high_confidence_score) or
-        (best_score >= MATCHING_CONFIG.medium_confidence_score and 
-         (best_score - second_best_score) >= MATCHING_CONFIG.score_difference_threshold)
+        best_score >= HIGH_CONFIDENCE_SCORE or
+        (is_scryfall_only and best_score >= SCRYFALL_SCORE) or
+        (best_score >= MEDIUM_CONFIDENCE_SCORE and
+         (best_score - second_best_score) >= SCORE_DIFFERENCE_THRESHOLD)
     )
     
     if should_confirm:
-        state.confirmed_matches[normalized_key] = best_match
+        state.confirmed_matches[joined_key or match_key(normalized_key)] = best_match
         return best_match
     
-    state.pending_confirmations.append((normalized_key, matches, ref_data))
+    state.add_pending(normalized_key, matches, ref_data)
     return None
 
 
@@ -123,45 +240,108 @@ def confirm_and_iterate_match(normalized_key, matches, ref_data):
 def extract_card_number(manabox_row: Dict[str, Any]) -> str:
     """Extract and clean card number from ManaBox data."""
     collector_number = manabox_row.get("Collector number", "").strip()
-    return re.sub(r"^[A-Za-z\-]*", "", collector_number.split("-")[-1])
+    return _COLLECTOR_PREFIX_RE.sub("", collector_number.split("-")[-1])
+
+
+def _contains_token(text: str) -> bool:
+    # Any casing of "token" contains a k or K; checking first skips the lowercase copy for most names
+    return ("k" in text or "K" in text) and "token" in text.lower()
 
 
 def is_token_card(card_name: str, set_name: str) -> bool:
     """Determine if a card is a token."""
-    return (
-        "token" in set_name.lower() or
-        "token" in card_name.lower() or
-        (set_name.startswith("T") and re.match(r"^T[A-Z0-9]+$", set_name))
-    )
+    if set_name[:1] == "T" and _TOKEN_SET_RE.match(set_name):
+        return True
+    return _contains_token(set_name) or _contains_token(card_name)
+
+
+def _get_token_ref_data(card_database: Dict, token_set_name: str) -> Dict[Tuple, Dict[str, Any]]:
+    """Return the token entries of the database matching a token set, cached per set."""
+    global _token_index_guard, _token_entries
+    
+    db_id, size = _token_index_guard
+    if db_id != id(card_database) or size > len(card_database):
+        _TOKEN_INDEX.clear()
+        _token_entries = []
+        size = 0
+    
+    # Only rows added since the last call are scanned; Scryfall fallback rows are
+    # appended to the database, so the per-set views only change when one is a token
+    for k, v in islice(card_database.items(), size, None):
+        if "_is_token" not in v:
+            prepare_card_entry(v)
+        if v["_is_token"]:
+            _token_entries.append((k, v))
+            _TOKEN_INDEX.clear()
+    _token_index_guard = (id(card_database), len(card_database))
+    
+    token_set_lower = token_set_name.lower()
+    token_ref_data = _TOKEN_INDEX.get(token_set_lower)
+    if token_ref_data is None:
+        token_set_base = token_set_lower.replace(" tokens", "")
+        token_ref_data = {
+            k: v for k, v in _token_entries
+            if token_set_lower in v["_set_name_lc"] or token_set_base in v["_set_name_lc"]
+        }
+        _TOKEN_INDEX[token_set_lower] = token_ref_data
+    return token_ref_data
+
+
+def _cached_best_match(key: Tuple, card_database: Dict) -> List[Tuple[Tuple, int]]:
+    """Return find_best_match results for a key, scoring each unique key only once."""
+    global _match_cache_guard
+    
+    db_id, size = _match_cache_guard
+    if db_id != id(card_database) or size > len(card_database):
+        _MATCH_CACHE.clear()
+    elif size < len(card_database):
+        # Rows were added (Scryfall fallbacks); only queries whose name lets them
+        # become a candidate can score differently
+        new_names = {ref_key[0] for ref_key in islice(card_database, size, None)}
+        stale = [cached_key for cached_key in _MATCH_CACHE
+                 if any(names_may_match(cached_key[0], name) for name in new_names)]
+        for cached_key in stale:
+            del _MATCH_CACHE[cached_key]
+    _match_cache_guard = (id(card_database), len(card_database))
+    
+    matches = _MATCH_CACHE.get(key)
+    if matches is None:
+        matches = find_best_match(key, card_database, card_database)
+        _MATCH_CACHE[key] = matches
+    # Callers may insert Scryfall matches, so hand out a copy
+    return list(matches)
 
 
 def process_card(manabox_row: Dict[str, Any], card_database: Dict, condition: str, 
-                card_name: str, set_name: str, is_token: bool = False) -> Optional[Dict[str, Any]]:
+                card_name: str, set_name: str, is_token: bool = False,
+                card_number: Optional[str] = None,
+                state: ProcessingState = state) -> Optional[CardEntry]:
     """Unified card processing function."""
-    card_number = extract_card_number(manabox_row)
+    if card_number is None:
+        card_number = extract_card_number(manabox_row)
     
     if not card_name or not set_name:
         return None
     
     # Handle token-specific processing
     if is_token:
-        return _process_token_card(manabox_row, card_database, condition, card_name, set_name, card_number)
+        return _process_token_card(manabox_row, card_database, condition, card_name, set_name, card_number,
+                                   state)
     
     # Standard card processing
-    normalized_result = normalize_key(card_name, set_name, condition, card_number)
+    normalized_result, joined_key = _normalize_key_cached(card_name, set_name, condition, card_number)
     if not normalized_result:
         return None
     
     key = normalized_result[:4]
     
     # Check for existing confirmed match
-    if key in state.confirmed_matches:
-        ref_row = card_database[state.confirmed_matches[key]]
-        product_name = ref_row.get("Product Name", "") + normalized_result[4]
-        return build_card_entry(manabox_row, condition, ref_row, product_name=product_name)
+    if joined_key in state.confirmed_matches:
+        return _finalize_match(manabox_row, condition, card_database[state.confirmed_matches[joined_key]],
+                               normalized_result[4])
     
     # Find matches
-    matches = find_best_match(key, card_database, card_database)
+    matches = _cached_best_match(key, card_database)
     
     # Enhance with Scryfall if needed
     if not matches or (matches and matches[0][1] < MATCHING_CONFIG.medium_confidence_score):
@@ -170,31 +350,30 @@ def process_card(manabox_row: Dict[str, Any], card_database: Dict, condition: st
     # Process matches
     confirmed_match = None
     if matches:
-        confirmed_match = confirm_and_iterate_match(key, matches, card_database)
+        confirmed_match = confirm_and_iterate_match(key, matches, card_database, state, joined_key)
     
     if confirmed_match:
         ref_row = card_database[confirmed_match]
+        entry = _finalize_match(manabox_row, condition, ref_row, normalized_result[4])
         if ref_row.get("TCGplayer Id") == DEFAULT_SCRYFALL_ID:
-            product_name = ref_row.get("Product Name", "") + normalized_result[4]
-            scryfall_entry = build_card_entry(manabox_row, condition, ref_row, product_name=product_name)
-            state.scryfall_only_cards.append(scryfall_entry)
+            state.add_scryfall_only(entry)
             return None
-        product_name = ref_row.get("Product Name", "") + normalized_result[4]
-        return build_card_entry(manabox_row, condition, ref_row, product_name=product_name)
+        return entry
     
     # Add to given up if not already pending
-    if not any(item[0] == key for item in state.pending_confirmations):
+    if joined_key not in state.pending_keys:
         fallback = build_card_entry(manabox_row, condition, product_name=card_name, set_name=set_name)
-        state.given_up_cards.append(fallback)
+        state.add_given_up(fallback)
     
     return None
 
 
 def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condition: str, 
-                       card_name: str, set_name: str, card_number: str) -> Optional[Dict[str, Any]]:
+                       card_name: str, set_name: str, card_number: str,
+                       state: ProcessingState = state) -> Optional[CardEntry]:
     """Process token cards with specialized logic."""
     # Determine token set name
-    if set_name.startswith("T") and re.match(r"^T[A-Z0-9]+$", set_name):
+    if set_name.startswith("T") and _TOKEN_SET_RE.match(set_name):
         token_set_name = set_name[1:] + " tokens"
     else:
         token_set_name = set_name
@@ -203,23 +382,17 @@ def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condit
     if "//" in card_name:
         parts = card_name.split("//")
         side1 = parts[0].strip()
-        side2 = re.sub(r"double[-\s]?sided token", "", parts[1], flags=re.IGNORECASE).strip()
+        side2 = _DOUBLE_SIDED_RE.sub("", parts[1]).strip()
         token_product_name = f"{side1} // {side2}"
     else:
         token_product_name = card_name
     
     # Filter database for tokens
-    token_set_base = token_set_name.lower().replace(" tokens", "")
-    token_ref_data = {
-        k: v for k, v in card_database.items()
-        if (
-            ("token" in v.get("Set Name", "").lower() or "token" in v.get("Product Name", "").lower()) and
-            (token_set_name.lower() in v.get("Set Name", "").lower() or token_set_base in v.get("Set Name", "").lower())
-        )
-    }
+    token_ref_data = _get_token_ref_data(card_database, token_set_name)
     
     # Use unified processing with token-specific database and lower threshold
-    normalized_result = normalize_key(token_product_name, token_set_name, condition, card_number)
+    normalized_result, joined_key = _normalize_key_cached(token_product_name, token_set_name, condition,
+                                                          card_number)
     
     if not normalized_result:
         print(f"Skipping invalid or prerelease token: {card_name} from set {set_name}")
@@ -228,8 +401,8 @@ def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condit
     key = normalized_result[:4]
     
     # Check for existing confirmed match
-    if key in state.confirmed_matches:
-        ref_row = token_ref_data[state.confirmed_matches[key]]
+    if joined_key in state.confirmed_matches:
+        ref_row = token_ref_data[state.confirmed_matches[joined_key]]
         return build_card_entry(manabox_row, condition, ref_row,
                               product_name=ref_row.get("Product Name", token_product_name),
                               set_name=token_set_name,
@@ -241,11 +414,11 @@ def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condit
     
     if not matches or (matches and matches[0][1] < MATCHING_CONFIG.token_score):
         # Add to given up if not already pending
-        if not any(item[0] == key for item in state.pending_confirmations):
+        if joined_key not in state.pending_keys:
             fallback = build_card_entry(manabox_row, condition,
                                       product_name=token_product_name, set_name=token_set_name,
                                       number=card_number, rarity=DEFAULT_TOKEN_RARITY)
-            state.given_up_cards.append(fallback)
+            state.add_given_up(fallback)
         return None
     
     # Process matches
@@ -254,7 +427,7 @@ def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condit
     if best_score >= MATCHING_CONFIG.token_score:
         chosen_match = best_match
     else:
-        state.pending_confirmations.append((normalized_result, matches, token_ref_data))
+        state.add_pending(normalized_result, matches, token_ref_data)
         return None
     
     # Handle double-sided token special case
@@ -264,7 +437,7 @@ def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condit
             if is_double_sided_candidate(token_ref_data[m].get("Product Name", ""))
         ]
         if ds_matches and ds_matches[0][0] != chosen_match:
-            state.pending_confirmations.append((normalized_result, ds_matches, token_ref_data))
+            state.add_pending(normalized_result, ds_matches, token_ref_data)
             return None
     
     if chosen_match:
@@ -282,22 +455,89 @@ def _process_token_card(manabox_row: Dict[str, Any], card_database: Dict, condit
 # MAIN PROCESSING FUNCTION
 # =============================================================================
 
-def map_fields(manabox_row, card_database):
+def map_fields(manabox_row, card_database, state: ProcessingState = state):
     """Main entry point for processing ManaBox card data."""
     config = CARD_PROCESSING_CONFIG
     
     card_name = manabox_row.get(config.manabox_name_field, "").strip()
     set_name = manabox_row.get(config.manabox_set_field, "").strip()
     condition_code = manabox_row.get(config.manabox_condition_field, "near mint").strip().lower().replace("_", " ")
-    foil = "Foil" if manabox_row.get(config.manabox_foil_field, "normal").lower() == "foil" else ""
-    condition = CONDITION_MAP.get(condition_code, DEFAULT_CONDITION)
-    
-    if foil:
-        condition += " Foil"
+    is_foil = manabox_row.get(config.manabox_foil_field, "normal").lower() == "foil"
+    condition = _CONDITION_COMBINED.get((condition_code, is_foil), _DEFAULT_CONDITIONS[is_foil])
     
     # Process using unified approach
     is_token = is_token_card(card_name, set_name)
-    return process_card(manabox_row, card_database, condition, card_name, set_name, is_token)
+    return process_card(manabox_row, card_database, condition, card_name, set_name, is_token, state=state)
+
+
+def _prefetch_scryfall(rows: List[Tuple], card_database: Dict, state: ProcessingState) -> None:
+    """Batch the Scryfall fallbacks for every non-token row whose best match is too weak."""
+    lookups = []
+    for manabox_row, condition, card_name, set_name, token, card_number in rows:
+        if token or not card_name or not set_name:
+            continue
+        normalized_result, joined_key = _normalize_key_cached(card_name, set_name, condition, card_number)
+        if not normalized_result or joined_key in state.confirmed_matches:
+            continue
+        matches = _cached_best_match(normalized_result[:4], card_database)
+        if not matches or matches[0][1] < MEDIUM_CONFIDENCE_SCORE:
+            lookups.append((normalized_result, manabox_row))
+    
+    if lookups:
+        prefetch_scryfall_fallbacks(lookups)
+
+
+def map_fields_batch(df: pd.DataFrame, card_database: Dict,
+                     state: ProcessingState = state) -> List[CardEntry]:
+    """
+    Process a whole ManaBox table at once.
+    
+    The per-row field cleanup (condition, foil, token detection, collector number)
+    is done with column operations; only the matching runs row by row.
+    
+    Args:
+        df: ManaBox rows, read with string dtypes
+        card_database: Reference data keyed by normalized key
+        state: Processing state receiving given-up, Scryfall-only and pending cards
+    
+    Returns:
+        List of TCGPlayer card entries, in input order
+    """
+    config = CARD_PROCESSING_CONFIG
+    
+    def column(field_name: str, default: str) -> pd.Series:
+        if field_name in df.columns:
+            return df[field_name].fillna(default).astype(str)
+        return pd.Series(default, index=df.index, dtype=object)
+    
+    card_names = column(config.manabox_name_field, "").str.strip()
+    set_names = column(config.manabox_set_field, "").str.strip()
+    
+    condition_codes = (column(config.manabox_condition_field, "near mint")
+                       .str.strip().str.lower().str.replace("_", " ", regex=False))
+    foil = np.where(column(config.manabox_foil_field, "normal").str.lower() == "foil", " Foil", "")
+    conditions = condition_codes.map(CONDITION_MAP).fillna(DEFAULT_CONDITION) + foil
+    
+    is_token = (
+        set_names.str.contains("token", case=False, regex=False) |
+        card_names.str.contains("token", case=False, regex=False) |
+        set_names.str.match(_TOKEN_SET_RE.pattern)
+    )
+    
+    card_numbers = (column(config.manabox_collector_number_field, "")
+                    .str.strip().str.split("-").str[-1]
+                    .str.replace(_COLLECTOR_PREFIX_RE.pattern, "", regex=True))
+    
+    rows = list(zip(df.to_dict('records'), conditions, card_names, set_names, is_token, card_numbers))
+    _prefetch_scryfall(rows, card_database, state)
+    
+    cards = []
+    for manabox_row, condition, card_name, set_name, token, card_number in rows:
+        tcgplayer_row = process_card(manabox_row, card_database, condition, card_name, set_name,
+                                     bool(token), card_number, state)
+        if tcgplayer_row:
+            cards.append(tcgplayer_row)
+    return cards
 
 
 # =============================================================================
@@ -305,17 +545,19 @@ def map_fields(manabox_row, card_database):
 # =============================================================================
 
 # Direct access to state for simplicity
-given_up_cards = state.given_up_cards
-scryfall_only_cards = state.scryfall_only_cards
 confirmed_matches = state.confirmed_matches
 pending_confirmations = state.pending_confirmations
 
 # State management functions for external use
+def reset_state(n_rows: int = 0):
+    state.reset(n_rows)
+
 def get_pending_confirmations():
     return state.pending_confirmations
 
 def clear_pending_confirmations():
     state.pending_confirmations.clear()
+    state.pending_keys.clear()
 
 def get_given_up_cards():
     return state.given_up_cards
@@ -331,29 +573,30 @@ def get_confirmed_matches():
 # BACKWARD COMPATIBILITY
 # =============================================================================
 
-# Backward compatibility functions for external modules
+# Backward compatibility functions for external modules; these return plain dicts
 def build_standard_entry(ref_row, product_name_suffix, manabox_row, condition):
-    return build_card_entry(manabox_row, condition, ref_row, 
-                          product_name=ref_row.get("Product Name", "") + product_name_suffix)
+    return _finalize_match(manabox_row, condition, ref_row, product_name_suffix).to_dict()
 
 def build_token_entry(ref_row, token_set_name, token_product_name, token_number, manabox_row, condition):
     return build_card_entry(manabox_row, condition, ref_row,
                           product_name=token_product_name, set_name=token_set_name,
-                          number=token_number, rarity=DEFAULT_TOKEN_RARITY)
+                          number=token_number, rarity=DEFAULT_TOKEN_RARITY).to_dict()
 
 def build_token_fallback(token_set_name, token_product_name, card_number, manabox_row, condition):
     return build_card_entry(manabox_row, condition,
                           product_name=token_product_name, set_name=token_set_name,
-                          number=card_number, rarity=DEFAULT_TOKEN_RARITY)
+                          number=card_number, rarity=DEFAULT_TOKEN_RARITY).to_dict()
 
 def build_given_up_entry(manabox_row, condition, card_name, set_name):
     return build_card_entry(manabox_row, condition,
-                          product_name=card_name, set_name=set_name)
+                          product_name=card_name, set_name=set_name).to_dict()
 
 def process_standard(manabox_row, card_database, condition, card_name, set_name):
     """Backward compatibility wrapper."""
-    return process_card(manabox_row, card_database, condition, card_name, set_name, is_token=False)
+    entry = process_card(manabox_row, card_database, condition, card_name, set_name, is_token=False)
+    return entry.to_dict() if entry else None
 
 def process_token(manabox_row, card_database, condition, card_name, set_name):
     """Backward compatibility wrapper."""
-    return process_card(manabox_row, card_database, condition, card_name, set_name, is_token=True)
\ No newline at end of file
+    entry = process_card(manabox_row, card_database, condition, card_name, set_name, is_token=True)
+    return entry.to_dict() if entry else None
\ No newline at end of file
@@ -4,7 +4,9 @@ Configuration settings for MTG Card Converter.
 This module contains all configuration constants organized by functionality.
 """
 
-from typing import Dict, List, NamedTuple
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
 from dataclasses import dataclass
 
 
@@ -74,6 +76,9 @@ class ScryfallConfig:
     """Scryfall API configuration."""
     base_url: str = "https://api.scryfall.com"
     rate_limit: float = 0.1  # seconds between requests
+    cache_path: Path = Path.home() / ".cache" / "mtg-card-tools" / "scryfall_cache.json"
+    cache_max_age: float = 30 * 24 * 60 * 60  # seconds before the saved cache is discarded
+    cache_max_entries: int = 50_000  # least recently used responses are dropped beyond this
 
 
 SCRYFALL_CONFIG = ScryfallConfig()
@@ -81,6 +86,9 @@ SCRYFALL_CONFIG = ScryfallConfig()
 # Backward compatibility
 SCRYFALL_API_BASE: str = SCRYFALL_CONFIG.base_url
 SCRYFALL_RATE_LIMIT: float = SCRYFALL_CONFIG.rate_limit
+SCRYFALL_CACHE_PATH: Path = SCRYFALL_CONFIG.cache_path
+SCRYFALL_CACHE_MAX_AGE: float = SCRYFALL_CONFIG.cache_max_age
+SCRYFALL_CACHE_MAX_ENTRIES: int = SCRYFALL_CONFIG.cache_max_entries
 
 
 # =============================================================================
@@ -134,6 +142,7 @@ MATCHING_CONFIG = MatchingConfig()
 # Backward compatibility
 SPECIAL_PRINT_PENALTIES: Dict[str, int] = MATCHING_CONFIG.special_print_penalties
 PROMO_PATTERNS: List[str] = MATCHING_CONFIG.promo_patterns
+PROMO_PATTERN_RE = re.compile("|".join(PROMO_PATTERNS), re.IGNORECASE)
 
 # Score thresholds for backward compatibility
 HIGH_CONFIDENCE_SCORE: int = MATCHING_CONFIG.high_confidence_score
@@ -167,6 +176,7 @@ class CardProcessingConfig:
     manabox_collector_number_field: str = "Collector number"
     manabox_rarity_field: str = "Rarity"
     manabox_purchase_price_field: str = "Purchase price"
+    manabox_scryfall_id_field: str = "Scryfall ID"
     
     # Field names for reference data
     ref_tcgplayer_id_field: str = "TCGplayer Id"
@@ -187,3 +197,21 @@ DEFAULT_SCRYFALL_ID: str = CARD_PROCESSING_CONFIG.default_scryfall_id
 DEFAULT_TOKEN_RARITY: str = CARD_PROCESSING_CONFIG.default_token_rarity
 DEFAULT_CONDITION: str = CARD_PROCESSING_CONFIG.default_condition
 DEFAULT_QUANTITY: str = CARD_PROCESSING_CONFIG.default_quantity
+
+
+# =============================================================================
+# MANABOX COLUMNS
+# =============================================================================
+
+# ManaBox export columns the converter reads
+MANABOX_COLUMNS: Tuple[str, ...] = (
+    CARD_PROCESSING_CONFIG.manabox_name_field,
+    CARD_PROCESSING_CONFIG.manabox_set_field,
+    CARD_PROCESSING_CONFIG.manabox_condition_field,
+    CARD_PROCESSING_CONFIG.manabox_foil_field,
+    CARD_PROCESSING_CONFIG.manabox_quantity_field,
+    CARD_PROCESSING_CONFIG.manabox_collector_number_field,
+    CARD_PROCESSING_CONFIG.manabox_purchase_price_field,
+    CARD_PROCESSING_CONFIG.manabox_rarity_field,
+    CARD_PROCESSING_CONFIG.manabox_scryfall_id_field,
+)
@@ -1,15 +1,18 @@
-import csv
+import logging
 from tkinter import Tk
 from .config import TCGPLAYER_FIELDS
 from .file_handling import (
-    detect_csv_files, load_reference_data, create_output_folder, write_output_files
+    detect_csv_files, load_reference_data, load_manabox_frame, create_output_folder, write_output_files
 )
 from .card_processing import (
-    map_fields, get_pending_confirmations, clear_pending_confirmations,
+    map_fields_batch, reset_state, get_pending_confirmations, clear_pending_confirmations,
     get_given_up_cards, get_scryfall_only_cards, get_confirmed_matches
 )
-from .data_processing import merge_entries
+from .data_processing import merge_entries, match_key, pop_missing_number_count
 from .gui import confirm_match_gui_batch, select_csv_file
+from .scryfall_api import load_cache, save_cache
+
+logger = logging.getLogger(__name__)
 
 
 def process_confirmations():
@@ -31,13 +34,13 @@ def process_confirmations():
                 
                 if result:
                     confirmed_matches = get_confirmed_matches()
-                    confirmed_matches[normalized_key] = result
+                    confirmed_matches[match_key(normalized_key)] = result
                     ref_row = ref_data[result]
                     confirmed_count += 1
-                    print(f"Confirmed: {normalized_key[0]} -> {ref_row.get('Product Name', 'Unknown')}")
+                    logger.debug("Confirmed: %s -> %s", normalized_key[0], ref_row.get('Product Name', 'Unknown'))
                 else:
                     skipped_count += 1
-                    print(f"Skipped: {normalized_key[0]}")
+                    logger.debug("Skipped: %s", normalized_key[0])
         
         print(f"Manual confirmations completed: {confirmed_count} confirmed, {skipped_count} skipped")
         clear_pending_confirmations()
@@ -46,7 +49,7 @@ def process_confirmations():
         print(f"GUI confirmation failed: {e}")
         print("Adding all unconfirmed items to unmatched list...")
         for normalized_key, matches, ref_data in pending_confirmations:
-            print(f"Unmatched: {normalized_key[0]}")
+            logger.debug("Unmatched: %s", normalized_key[0])
         clear_pending_confirmations()
 
 
@@ -59,14 +62,19 @@ def convert_manabox_to_tcgplayer(manabox_csv, reference_csv):
     output_dir = create_output_folder()
     print(f"Output folder: {output_dir}")
     
-    cards = []
     try:
-        with open(manabox_csv, mode='r', newline='', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
-            for row in reader:
-                tcgplayer_row = map_fields(row, ref_data)
-                if tcgplayer_row:
-                    cards.append(tcgplayer_row)
+        manabox_df = load_manabox_frame(manabox_csv)
+        reset_state(len(manabox_df))
+        cached_lookups = load_cache()
+        if cached_lookups:
+            print(f"Loaded {cached_lookups:,} cached Scryfall lookups")
+        cards = map_fields_batch(manabox_df, ref_data)
+        save_cache()
+        
+        missing_numbers = pop_missing_number_count()
+        if missing_numbers:
+            logger.warning("%d unique cards without an exact collector number match; closest variants were used",
+                           missing_numbers)
         
         merged_cards = merge_entries(cards)
         print(f"Conversion complete: {len(merged_cards)} cards")
@@ -100,6 +108,7 @@ def convert_manabox_to_tcgplayer(manabox_csv, reference_csv):
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("MTG Card Converter v2.0")
     print("Scanning for CSV files...")
     
@@ -1,25 +1,88 @@
+import logging
 import re
+import sys
 import unicodedata
-from rapidfuzz import fuzz
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, NamedTuple, Tuple
+import numpy as np
+import pandas as pd
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
 from .config import (
     SET_ALIAS, CONDITION_MAP, condition_rank, FLOOR_PRICE, 
-    SPECIAL_PRINT_PENALTIES, FILTER_PRERELEASE, FILTER_PROMO, PROMO_PATTERNS
+    SPECIAL_PRINT_PENALTIES, FILTER_PRERELEASE, FILTER_PROMO, PROMO_PATTERNS, TCGPLAYER_FIELDS
+)
+from .scryfall_api import (
+    query_scryfall_card, query_scryfall_by_id, prefetch_cards_by_id, prefetch_cards_by_number
 )
-from .scryfall_api import query_scryfall_card, query_scryfall_by_id
 
+logger = logging.getLogger(__name__)
 
-def remove_accents(text):
+_PAREN_RE = re.compile(r"\(.*?\)")
+_NAME_RE = re.compile(r"[^a-zA-Z0-9 ,'-]")
+_SET_RE = re.compile(r"[^a-zA-Z0-9 ]")
+_NUM_RE = re.compile(r"[^\d\-]")
+
+# Queries that found no exact collector number match since the last pop_missing_number_count()
+_missing_number_keys = set()
+
+
+def _strip_combining(text):
     return ''.join(
         c for c in unicodedata.normalize('NFKD', text)
         if not unicodedata.combining(c)
     )
 
 
+# Latin-1 and Latin Extended-A characters mapped to their accent-free forms, which covers
+# the accented characters found in card and set names
+_ACCENT_TABLE = {
+    code: _strip_combining(chr(code)) for code in range(0x80, 0x180)
+    if _strip_combining(chr(code)) != chr(code)
+}
+
+
+def remove_accents(text):
+    stripped = text.translate(_ACCENT_TABLE)
+    if stripped.isascii():
+        return stripped
+    return _strip_combining(text)
+
+
 def is_double_sided_candidate(product_name):
     pn = product_name.lower()
     return '//' in pn or ('double' in pn and 'sided' in pn)
 
 
+def prepare_card_entry(row):
+    row["_set_name_lc"] = row.get("Set Name", "").lower()
+    row["_product_name_lc"] = row.get("Product Name", "").lower()
+    row["_is_token"] = "token" in row["_set_name_lc"] or "token" in row["_product_name_lc"]
+    row["_is_prerelease"] = "prerelease" in row["_product_name_lc"] or "prerelease cards" in row["_set_name_lc"]
+    return row
+
+
+def is_prerelease_entry(row):
+    if "_is_prerelease" not in row:
+        prepare_card_entry(row)
+    return row["_is_prerelease"]
+
+
+def prepare_card_columns(ref_df):
+    # Column-wise prepare_card_entry, for building a database straight from a DataFrame
+    set_names = ref_df["Set Name"].fillna("").astype(str).str.lower()
+    product_names = ref_df["Product Name"].fillna("").astype(str).str.lower()
+    return ref_df.assign(
+        _set_name_lc=set_names,
+        _product_name_lc=product_names,
+        _is_token=(set_names.str.contains("token", regex=False) |
+                   product_names.str.contains("token", regex=False)),
+        _is_prerelease=(product_names.str.contains("prerelease", regex=False) |
+                        set_names.str.contains("prerelease cards", regex=False)),
+    )
+
+
 def get_market_price(manabox_row, ref_row=None):
     candidate_fields = ["TCG Marketplace Price", "List Price", "Retail Price"]
     if ref_row:
@@ -46,14 +109,14 @@ def get_market_price(manabox_row, ref_row=None):
 def normalize_key(card_name, set_name, condition, number):
     suffix = ""
     if "(" in card_name and ")" in card_name:
-        card_name = re.sub(r"\(.*?\)", "", card_name).strip()
+        card_name = _PAREN_RE.sub("", card_name).strip()
     
     card_name = remove_accents(card_name)
     card_name = card_name.split('//')[0].strip()
-    normalized_card_name = re.sub(r"[^a-zA-Z0-9 ,'-]", "", card_name).strip().lower()
+    normalized_card_name = _NAME_RE.sub("", card_name).strip().lower()
     
     set_name = remove_accents(set_name)
-    normalized_set_name = re.sub(r"[^a-zA-Z0-9 ]", "", set_name).strip().lower()
+    normalized_set_name = _SET_RE.sub("", set_name).strip().lower()
     
     if normalized_set_name in ["plst", "the list"]:
         normalized_set_name = "the list reprints"
@@ -64,79 +127,314 @@ def normalize_key(card_name, set_name, condition, number):
     if normalized_set_name == "the list":
         number = number.split("-")[-1] if number else ""
     
-    normalized_number = re.sub(r"[^\d\-]", "", str(number).strip()) if number else None
+    normalized_number = _NUM_RE.sub("", str(number).strip()) if number else None
     if normalized_number == "":
         normalized_number = None
     
     return normalized_card_name, normalized_set_name, normalized_number, condition.lower(), suffix
 
 
+def normalize_key_columns(card_names, set_names, conditions, numbers):
+    # Column-wise normalize_key over pandas Series; returns one key (or None) per row.
+    # ASCII-folding after NFKD drops the same characters as remove_accents followed by
+    # the name/set cleanup patterns.
+    names = (card_names.fillna("").astype(str)
+             .str.replace(_PAREN_RE, "", regex=True)
+             .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+             .str.split("//", regex=False).str[0]
+             .str.replace(_NAME_RE, "", regex=True).str.strip().str.lower())
+    sets = (set_names.fillna("").astype(str)
+            .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.replace(_SET_RE, "", regex=True).str.strip().str.lower()
+            .replace({"plst": "the list reprints", "the list": "the list reprints"}))
+    cleaned_numbers = (numbers.fillna("").astype(str).str.strip()
+                       .str.replace(_NUM_RE, "", regex=True))
+    lowered_conditions = conditions.fillna("Near Mint").astype(str).str.lower()
+    
+    return [
+        None if "prerelease cards" in set_name else (name, set_name, number or None, condition, "")
+        for name, set_name, number, condition in zip(names, sets, cleaned_numbers, lowered_conditions)
+    ]
+
+
+def match_key(normalized_key):
+    """Flatten a normalized key tuple into one interned string for dict lookups."""
+    return sys.intern("\x1f".join(part or "" for part in normalized_key))
+
+
+class NameBucket(NamedTuple):
+    single_word: Dict[str, List[int]]
+    multi_word: Dict[str, List[int]]
+    single_positions: List[int]
+    multi_positions: List[int]
+
+
+class NameIndex(NamedTuple):
+    keys: List[Tuple]
+    buckets: Dict[str, NameBucket]
+    empty_positions: List[int]
+    fields: np.ndarray
+    candidates: Dict[str, np.ndarray]
+    field_buffer: np.ndarray
+
+
+# Name indexes per database; each entry keeps its database alive so ids stay unique
+_NAME_INDEXES = {}
+_MAX_NAME_INDEXES = 64
+
+_KEY_FIELDS = ("name", "set", "number", "condition")
+
+
+def _index_key(buckets, empty_positions, pos, ref_key):
+    words = ref_key[0].split()
+    if not words:
+        empty_positions.append(pos)
+        return
+    
+    bucket = buckets.get(ref_key[0][0])
+    if bucket is None:
+        bucket = buckets[ref_key[0][0]] = NameBucket({}, {}, [], [])
+    if len(words) == 1:
+        bucket.single_word.setdefault(words[0], []).append(pos)
+        bucket.single_positions.append(pos)
+    else:
+        for word in set(words):
+            bucket.multi_word.setdefault(word, []).append(pos)
+        bucket.multi_positions.append(pos)
+
+
+def _key_columns(keys):
+    return [[ref_key[part] or "" for ref_key in keys] for part in range(4)]
+
+
+def _fill_fields(buffer, start, columns):
+    # Returns the buffer to write into, replaced by a larger or wider one when the
+    # new rows do not fit; rows past the filled count are spare room for later keys
+    count = start + len(columns[0])
+    widths = [max([buffer.dtype[name].itemsize // 4] + [len(value) for value in column])
+              for name, column in zip(_KEY_FIELDS, columns)]
+    if count > len(buffer) or widths != [buffer.dtype[name].itemsize // 4 for name in _KEY_FIELDS]:
+        old = buffer
+        buffer = np.recarray(max(count, 2 * len(old)),
+                             dtype=[(name, f"U{width}") for name, width in zip(_KEY_FIELDS, widths)])
+        for name in _KEY_FIELDS:
+            buffer[name][:start] = old[name][:start]
+    for name, column in zip(_KEY_FIELDS, columns):
+        buffer[name][start:count] = column
+    return buffer
+
+
+def build_name_index(card_database):
+    keys = list(card_database.keys())
+    buckets = {}
+    empty_positions = []
+    
+    for pos, ref_key in enumerate(keys):
+        _index_key(buckets, empty_positions, pos, ref_key)
+    
+    # Key parts as a structured array, so candidate filters run as array comparisons
+    buffer = _fill_fields(np.recarray(0, dtype=[(name, "U1") for name in _KEY_FIELDS]), 0, _key_columns(keys))
+    return NameIndex(keys, buckets, empty_positions, buffer[:len(keys)], {}, buffer)
+
+
+def extend_name_index(index, card_database):
+    """Add the keys inserted into card_database since the index was built or last extended."""
+    start = len(index.keys)
+    new_keys = list(islice(card_database, start, None))
+    for pos, ref_key in enumerate(new_keys, start):
+        index.keys.append(ref_key)
+        _index_key(index.buckets, index.empty_positions, pos, ref_key)
+        for name in [name for name in index.candidates if names_may_match(name, ref_key[0])]:
+            del index.candidates[name]
+    
+    buffer = _fill_fields(index.field_buffer, start, _key_columns(new_keys))
+    return index._replace(fields=buffer[:len(index.keys)], field_buffer=buffer)
+
+
+def get_name_index(card_database):
+    # Keys are only ever added to a reference database (Scryfall fallback rows), so an
+    # index that has fallen behind is extended instead of rebuilt
+    entry = _NAME_INDEXES.get(id(card_database))
+    if entry and entry[0] is card_database and len(entry[1].keys) <= len(card_database):
+        index = entry[1]
+        if len(index.keys) < len(card_database):
+            index = extend_name_index(index, card_database)
+            _NAME_INDEXES[id(card_database)] = (card_database, index)
+        return index
+    
+    if len(_NAME_INDEXES) >= _MAX_NAME_INDEXES:
+        _NAME_INDEXES.clear()
+    index = build_name_index(card_database)
+    _NAME_INDEXES[id(card_database)] = (card_database, index)
+    return index
+
+
+def names_may_match(query_name, ref_name):
+    """Pairwise form of the name filter applied by candidate_positions."""
+    query_words = query_name.split()
+    ref_words = ref_name.split()
+    if not query_words or not ref_words:
+        return True
+    if query_name[0] != ref_name[0]:
+        return False
+    if len(query_words) == 1 and len(ref_words) == 1:
+        return query_words[0] == ref_words[0]
+    if len(query_words) > 1 and len(ref_words) > 1:
+        return not set(query_words).isdisjoint(ref_words)
+    return True
+
+
+def candidate_positions(normalized_name, index):
+    # Same rules as comparing names pairwise: first letters must agree, single-word
+    # names must be equal, multi-word names must share a word, and mixed word
+    # counts always pass. Results are kept per name, since a collection repeats names
+    # across sets, numbers and conditions.
+    cached = index.candidates.get(normalized_name)
+    if cached is not None:
+        return cached
+    
+    query_words = normalized_name.split()
+    if not query_words:
+        return np.arange(len(index.keys))
+    
+    positions = set(index.empty_positions)
+    bucket = index.buckets.get(normalized_name[0])
+    if bucket is not None:
+        if len(query_words) == 1:
+            positions.update(bucket.single_word.get(query_words[0], ()))
+            positions.update(bucket.multi_positions)
+        else:
+            for word in query_words:
+                positions.update(bucket.multi_word.get(word, ()))
+            positions.update(bucket.single_positions)
+    
+    candidates = index.candidates[normalized_name] = np.array(sorted(positions), dtype=np.intp)
+    return candidates
+
+
+@lru_cache(maxsize=1024)
+def clean_condition(condition):
+    return condition.replace("foil", "").strip()
+
+
+@lru_cache(maxsize=1024)
+def special_print_mask(condition):
+    # Bit i is set when the i-th SPECIAL_PRINT_PENALTIES term appears in the condition
+    return sum(1 << bit for bit, term in enumerate(SPECIAL_PRINT_PENALTIES) if term in condition)
+
+
+def _condition_adjustment(query_condition, ref_condition):
+    cond1 = clean_condition(query_condition)
+    cond2 = clean_condition(ref_condition)
+    if cond1 in condition_rank and cond2 in condition_rank:
+        diff = abs(condition_rank[cond1] - condition_rank[cond2])
+        if diff == 0:
+            return 50
+        elif diff == 1:
+            return -10
+        return -30
+    if query_condition != ref_condition:
+        return -20
+    return 0
+
+
 def find_best_match(normalized_key, card_database, ref_data):
     matches = []
     exact_number_matches = []
+    query_name, query_set, query_number, query_condition = normalized_key[:4]
     
-    for ref_key in card_database.keys():
-        if normalized_key[0] and ref_key[0] and normalized_key[0][0] != ref_key[0][0]:
-            continue
-        
-        query_words = normalized_key[0].split()
-        candidate_words = ref_key[0].split()
-        if len(query_words) == 1 and len(candidate_words) == 1:
-            if query_words[0] != candidate_words[0]:
-                continue
-        elif len(query_words) > 1 and len(candidate_words) > 1:
-            if not set(query_words).intersection(set(candidate_words)):
-                continue
-        
-        base_score = fuzz.ratio(normalized_key[0], ref_key[0])
-        if normalized_key[0] in ref_key[0] or ref_key[0] in normalized_key[0]:
-            base_score += 20
-        if normalized_key[1] == ref_key[1]:
-            base_score += 50
-        if not normalized_key[2] or not ref_key[2]:
-            base_score += 50
-        elif normalized_key[2] == ref_key[2]:
-            base_score += 100
-            exact_number_matches.append((ref_key, base_score))
-        else:
-            base_score -= 15
-        
-        cond1 = normalized_key[3].replace("foil", "").strip()
-        cond2 = ref_key[3].replace("foil", "").strip()
-        if cond1 in condition_rank and cond2 in condition_rank:
-            diff = abs(condition_rank[cond1] - condition_rank[cond2])
-            if diff == 0:
-                base_score += 50
-            elif diff == 1:
-                base_score -= 10
-            else:
-                base_score -= 30
-        else:
-            if normalized_key[3] != ref_key[3]:
-                base_score -= 20
-        
-        if ("prerelease" in ref_data[ref_key]["Product Name"].lower() or
-                "prerelease cards" in ref_data[ref_key]["Set Name"].lower()):
+    # An exact key hit is the best possible exact-number match (name, set and number bonuses),
+    # so return it directly instead of scanning every candidate.
+    exact_key = (query_name, query_set, query_number, query_condition, "")
+    if query_number and exact_key in card_database and not is_prerelease_entry(ref_data[exact_key]):
+        return [(exact_key, 100.0 + 20 + 50 + 100)]
+    
+    index = get_name_index(card_database)
+    positions = candidate_positions(query_name, index)
+    
+    if not len(positions):
+        return matches
+    
+    candidates = [index.keys[pos] for pos in positions.tolist()]
+    fields = index.fields[positions]
+    names = fields.name.tolist()
+    
+    # Score all name candidates in one rapidfuzz call, then apply the bonuses column-wise.
+    # Adjustments are added in the same order as the pairwise rules so scores match exactly.
+    scores = process.cdist([query_name], names, scorer=Indel.normalized_similarity,
+                           dtype=np.float64)[0] * 100
+    scores += np.array([query_name in name or name in query_name for name in names]) * 20
+    scores += (fields.set == query_set) * 50
+    
+    if query_number:
+        missing = fields.number == ""
+        exact = (fields.number == query_number) & ~missing
+        scores += np.where(missing, 50, np.where(exact, 100, -15))
+        exact_positions = np.flatnonzero(exact).tolist()
+        exact_number_matches = [(candidates[i], score)
+                                for i, score in zip(exact_positions, scores[exact_positions].tolist())]
+    else:
+        scores += 50
+    
+    # Condition rules only depend on the condition string, so evaluate them once per unique
+    # condition and broadcast back to the candidates through an index array.
+    unique_conditions, codes = np.unique(fields.condition, return_inverse=True)
+    unique_conditions = unique_conditions.tolist()
+    adjustments = np.array([_condition_adjustment(query_condition, condition) for condition in unique_conditions])
+    print_masks = np.array([special_print_mask(condition) for condition in unique_conditions], dtype=np.int64)
+    scores += adjustments[codes]
+    
+    mismatched = print_masks[codes] ^ special_print_mask(query_condition)
+    for bit, penalty in enumerate(SPECIAL_PRINT_PENALTIES.values()):
+        scores -= np.where(mismatched & (1 << bit), penalty, 0)
+    
+    for ref_key, score in zip(candidates, scores.tolist()):
+        if is_prerelease_entry(ref_data[ref_key]):
             continue
-        
-        for term, penalty in SPECIAL_PRINT_PENALTIES.items():
-            in_query = term in normalized_key[3]
-            in_ref = term in ref_key[3]
-            if in_query != in_ref:
-                base_score -= penalty
-        
-        matches.append((ref_key, base_score))
+        matches.append((ref_key, score))
     
     if exact_number_matches:
         matches = exact_number_matches
     elif matches and normalized_key[2]:
-        print(
-            f"Warning: No exact collector number match found for {normalized_key[0]} #{normalized_key[2]}. Showing closest variants.")
+        _missing_number_keys.add(normalized_key[:4])
+        logger.debug("No exact collector number match found for %s #%s. Showing closest variants.",
+                     normalized_key[0], normalized_key[2])
     
     matches.sort(key=lambda x: x[1], reverse=True)
     return matches
 
 
+def pop_missing_number_count():
+    count = len(_missing_number_keys)
+    _missing_number_keys.clear()
+    return count
+
+
+def scryfall_set_code(set_name):
+    set_code = SET_ALIAS.get(set_name, set_name)
+    if len(set_name) > 3:
+        words = set_name.split()
+        if len(words) >= 2:
+            set_code = ''.join(word[0] for word in words[:3]).lower()
+    return set_code
+
+
+def prefetch_scryfall_fallbacks(lookups):
+    # Batch the Scryfall lookups enhance_matches_with_scryfall is about to make for
+    # (normalized_key, manabox_row) pairs, 75 cards per /cards/collection request.
+    scryfall_ids = []
+    numbered_cards = []
+    for normalized_key, manabox_row in lookups:
+        scryfall_id = str(manabox_row.get("Scryfall ID") or "").strip()
+        if scryfall_id:
+            scryfall_ids.append(scryfall_id)
+        elif normalized_key[2]:
+            numbered_cards.append((normalized_key[0], scryfall_set_code(normalized_key[1]), normalized_key[2]))
+    
+    prefetch_cards_by_id(scryfall_ids)
+    prefetch_cards_by_number(numbered_cards)
+
+
 def enhance_matches_with_scryfall(normalized_key, matches, ref_data, manabox_row=None):
     card_name, set_name, collector_number, condition, suffix = normalized_key
     scryfall_card = None
@@ -147,13 +445,7 @@ def enhance_matches_with_scryfall(normalized_key, matches, ref_data, manabox_row
             scryfall_card = query_scryfall_by_id(scryfall_id)
     
     if not scryfall_card:
-        set_code = SET_ALIAS.get(set_name, set_name)
-        if len(set_name) > 3:
-            words = set_name.split()
-            if len(words) >= 2:
-                set_code = ''.join(word[0] for word in words[:3]).lower()
-        
-        scryfall_card = query_scryfall_card(card_name, set_code, collector_number)
+        scryfall_card = query_scryfall_card(card_name, scryfall_set_code(set_name), collector_number)
     
     if scryfall_card:
         if not matches or (matches and matches[0][1] < 300):
@@ -163,14 +455,15 @@ def enhance_matches_with_scryfall(normalized_key, matches, ref_data, manabox_row
                 promo_info = f" (Promo: {', '.join(promo_types)})" if promo_types else " (Promo)"
             
             if manabox_row:
-                scryfall_entry = create_scryfall_fallback_entry(scryfall_card, manabox_row, condition)
+                scryfall_entry = prepare_card_entry(
+                    create_scryfall_fallback_entry(scryfall_card, manabox_row, condition))
                 synthetic_key = (card_name, set_name, collector_number, condition, suffix)
                 synthetic_match = (synthetic_key, 350)
                 ref_data[synthetic_key] = scryfall_entry
                 matches.insert(0, synthetic_match)
-                print(f"Found Scryfall-only variant{promo_info}")
+                logger.debug("Found Scryfall-only variant%s", promo_info)
     else:
-        print(f"Card not found on Scryfall")
+        logger.debug("Card not found on Scryfall: %s (%s)", card_name, set_name)
     
     return matches
 
@@ -196,14 +489,14 @@ def create_scryfall_fallback_entry(scryfall_card, manabox_row, condition):
 
 
 def merge_entries(cards):
-    merged = {}
-    for card in cards:
-        key = (card['TCGplayer Id'], card['Condition'])
-        if key in merged:
-            merged[key]['Add to Quantity'] += card['Add to Quantity']
-        else:
-            merged[key] = card
-    return list(merged.values())
+    # Returns a DataFrame with one row per (TCGplayer Id, Condition), in first-seen order;
+    # quantities are summed and the other fields come from the first entry of each group
+    df = pd.DataFrame([card.to_row() for card in cards], columns=TCGPLAYER_FIELDS)
+    group_keys = ["TCGplayer Id", "Condition"]
+    totals = df.groupby(group_keys, sort=False)["Add to Quantity"].transform("sum")
+    merged = df.drop_duplicates(group_keys).copy()
+    merged["Add to Quantity"] = totals[merged.index]
+    return merged.reset_index(drop=True)
 
 
 def auto_confirm_high_score(cards):
@@ -1,9 +1,15 @@
+import csv
+import logging
 import time
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from .config import FILTER_PRERELEASE, FILTER_PROMO, PROMO_PATTERNS, TCGPLAYER_FIELDS
-from .data_processing import normalize_key
+from .config import (
+    FILTER_PRERELEASE, FILTER_PROMO, PROMO_PATTERN_RE, TCGPLAYER_FIELDS, MANABOX_COLUMNS
+)
+from .data_processing import normalize_key_columns, prepare_card_columns, get_name_index
+
+logger = logging.getLogger(__name__)
 
 
 def detect_csv_files():
@@ -17,7 +23,7 @@ def detect_csv_files():
     
     for csv_file in csv_files:
         filename_lower = csv_file.name.lower()
-        print(f"Analyzing: {csv_file.name}")
+        logger.debug("Analyzing: %s", csv_file.name)
         
         if any(skip in filename_lower for skip in
                ['tcgplayer_staged', 'scryfall_verified', 'tcgplayer_given_up', 'cards_missing_from_tcgplayer']):
@@ -25,15 +31,15 @@ def detect_csv_files():
             continue
         
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                header = f.readline().lower()
+            with open(csv_file, 'r', newline='', encoding='utf-8-sig') as f:
+                header = frozenset(col.strip().lower() for col in next(csv.reader(f), []))
                 manabox_indicators = ['manabox id', 'scryfall id', 'set code']
                 manabox_matches = [col for col in manabox_indicators if col in header]
                 tcgplayer_indicators = ['tcgplayer id', 'product line', 'tcg market price']
                 tcgplayer_matches = [col for col in tcgplayer_indicators if col in header]
                 
-                print(f"  Manabox indicators found: {manabox_matches}")
-                print(f"  TCGplayer indicators found: {tcgplayer_matches}")
+                logger.debug("  Manabox indicators found: %s", manabox_matches)
+                logger.debug("  TCGplayer indicators found: %s", tcgplayer_matches)
                 
                 if 'manabox id' in header and 'scryfall id' in header:
                     if not manabox_file:
@@ -78,22 +84,25 @@ def load_reference_data(reference_csv):
             ref_df = ref_df[~mask]
         
         if FILTER_PROMO:
-            mask = ref_df["Product Name"].str.contains("|".join(PROMO_PATTERNS), case=False, na=False)
+            mask = ref_df["Product Name"].str.contains(PROMO_PATTERN_RE, na=False)
             excluded_count += mask.sum()
             ref_df = ref_df[~mask]
         
-        records = ref_df.to_dict('records')
+        keys = normalize_key_columns(
+            ref_df["Product Name"],
+            ref_df["Set Name"],
+            ref_df.get("Condition", pd.Series("Near Mint", index=ref_df.index)),
+            ref_df.get("Number", pd.Series("", index=ref_df.index))
+        )
+        ref_df = prepare_card_columns(ref_df)
+        columns = ref_df.columns.tolist()
         ref_data = {}
         
-        for row in records:
-            key = normalize_key(
-                row.get("Product Name", ""),
-                row.get("Set Name", ""),
-                row.get("Condition", "Near Mint"),
-                row.get("Number", "")
-            )
+        for key, row in zip(keys, ref_df.itertuples(index=False, name=None)):
             if key:
-                ref_data[key] = row
+                ref_data[key] = dict(zip(columns, row))
+        
+        get_name_index(ref_data)
         
         total_time = time.time() - start_time
         print(f"Loaded {len(ref_data):,} cards in {total_time:.1f}s" +
@@ -106,6 +115,15 @@ def load_reference_data(reference_csv):
         exit()
 
 
+def load_manabox_frame(manabox_csv):
+    """
+    Read the ManaBox columns the converter uses (MANABOX_COLUMNS) as strings,
+    keeping empty cells as empty strings.
+    """
+    return pd.read_csv(manabox_csv, usecols=lambda col: col in MANABOX_COLUMNS,
+                       dtype=str, keep_default_na=False, encoding='utf-8')
+
+
 def create_output_folder():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_dir = Path(f"converted_output_{timestamp}")
@@ -113,37 +131,28 @@ def create_output_folder():
     return output_dir
 
 
+def _entries_frame(entries):
+    return pd.DataFrame([entry.to_row() for entry in entries], columns=TCGPLAYER_FIELDS)
+
+
 def write_output_files(output_dir, merged_cards, scryfall_only_cards, given_up_cards):
     output_files = []
+    # Match the csv module's line endings so output is the same on every platform
+    csv_options = {'index': False, 'encoding': 'utf-8', 'lineterminator': '\r\n'}
     
     tcgplayer_csv = output_dir / "tcgplayer_staged_inventory.csv"
-    with open(tcgplayer_csv, mode='w', newline='', encoding='utf-8') as outfile:
-        import csv
-        writer = csv.DictWriter(outfile, fieldnames=TCGPLAYER_FIELDS)
-        writer.writeheader()
-        for card in merged_cards:
-            writer.writerow(card)
+    merged_cards.to_csv(tcgplayer_csv, columns=TCGPLAYER_FIELDS, **csv_options)
     output_files.append(str(tcgplayer_csv))
     
     if scryfall_only_cards:
         scryfall_csv = output_dir / "cards_missing_from_tcgplayer.csv"
-        with open(scryfall_csv, mode='w', newline='', encoding='utf-8') as sfile:
-            import csv
-            swriter = csv.DictWriter(sfile, fieldnames=TCGPLAYER_FIELDS)
-            swriter.writeheader()
-            for entry in scryfall_only_cards:
-                swriter.writerow(entry)
+        _entries_frame(scryfall_only_cards).to_csv(scryfall_csv, **csv_options)
         output_files.append(str(scryfall_csv))
         print(f"Missing from TCGplayer: {len(scryfall_only_cards)} cards")
     
     if given_up_cards:
         given_up_csv = output_dir / "tcgplayer_given_up.csv"
-        with open(given_up_csv, mode='w', newline='', encoding='utf-8') as gfile:
-            import csv
-            gwriter = csv.DictWriter(gfile, fieldnames=TCGPLAYER_FIELDS)
-            gwriter.writeheader()
-            for entry in given_up_cards:
-                gwriter.writerow(entry)
+        _entries_frame(given_up_cards).to_csv(given_up_csv, **csv_options)
         output_files.append(str(given_up_csv))
         print(f"Unmatched: {len(given_up_cards)} cards")
     
@@ -1,3 +1,4 @@
+import sys
 from tkinter import Button, END, Frame, Label, Listbox, Scrollbar, Tk
 from tkinter.filedialog import askopenfilename
 
@@ -30,13 +31,15 @@ def confirm_match_simple_fallback(pending_items):
     print("Commands: [1-9] select match, [s] skip, [a] auto-confirm all remaining")
     
     for i, (normalized_key, matches, ref_data) in enumerate(pending_items):
-        print(f"\n--- Item {i + 1}/{len(pending_items)} ---")
-        print(f"Card: {normalized_key[0]}")
-        print(f"Set: {normalized_key[1]} | Number: {normalized_key[2]}")
-        
-        for idx, (match, score) in enumerate(matches[:5]):
-            candidate = ref_data.get(match, {})
-            print(f"{idx + 1}: {candidate.get('Product Name', 'Unknown')} (Score: {score})")
+        # Each item's block is written in one call rather than one print per line
+        lines = [
+            f"\n--- Item {i + 1}/{len(pending_items)} ---",
+            f"Card: {normalized_key[0]}",
+            f"Set: {normalized_key[1]} | Number: {normalized_key[2]}",
+        ]
+        lines.extend(f"{idx + 1}: {ref_data.get(match, {}).get('Product Name', 'Unknown')} (Score: {score})"
+                     for idx, (match, score) in enumerate(matches[:5]))
+        sys.stdout.write("\n".join(lines) + "\n")
         
         while True:
             try:
@@ -64,6 +67,19 @@ def confirm_match_gui_batch(pending_items):
     if not pending_items:
         return {}
     
+    # Show the most confident matches first so they can be confirmed quickly; the
+    # results are keyed by position in the sorted list and mapped back afterwards
+    order = sorted(range(len(pending_items)), key=lambda i: -top_match_score(pending_items[i]))
+    results = _confirm_sorted_items([pending_items[i] for i in order])
+    return {order[i]: result for i, result in results.items()}
+
+
+def top_match_score(pending_item):
+    _, matches, _ = pending_item
+    return (matches[0][1] or 0) if matches else 0
+
+
+def _confirm_sorted_items(pending_items):
     print(f"Opening batch confirmation GUI for {len(pending_items)} items...")
     
     try:
@@ -75,6 +91,10 @@ def confirm_match_gui_batch(pending_items):
         
         results = {}
         current_item = [0]
+        display_cache = {}
+        shown_lines = []
+        shown_matches = []
+        shown_candidates = []
     except Exception as e:
         print(f"GUI initialization failed: {e}")
         return confirm_match_simple_fallback(pending_items)
@@ -181,12 +201,28 @@ def confirm_match_gui_batch(pending_items):
                          anchor="nw")
     preview_text.pack(fill="both", expand=True, pady=10)
     
+    def item_display(item_index):
+        # Shown matches, their reference rows and listbox rows for an item, built once per item
+        cached = display_cache.get(item_index)
+        if cached is None:
+            _, matches, ref_data = pending_items[item_index]
+            matches = matches[:10]
+            candidates = [ref_data.get(match, {}) for match, _ in matches]
+            lines = []
+            for idx, ((match, score), candidate) in enumerate(zip(matches, candidates)):
+                display_text = f"{idx + 1}. {candidate.get('Product Name', 'Unknown')}"
+                if score:
+                    display_text += f" (Score: {score})"
+                lines.append(display_text)
+            cached = display_cache[item_index] = (matches, candidates, lines)
+        return cached
+    
     def update_display():
         if current_item[0] >= len(pending_items):
             root.quit()
             return
         
-        normalized_key, matches, ref_data = pending_items[current_item[0]]
+        normalized_key = pending_items[current_item[0]][0]
         
         progress_label.config(text=f"Item {current_item[0] + 1} of {len(pending_items)}")
         
@@ -196,15 +232,23 @@ def confirm_match_gui_batch(pending_items):
         card_info += f"Condition: {normalized_key[3]}"
         card_info_label.config(text=card_info)
         
-        matches_listbox.delete(0, END)
-        for idx, (match, score) in enumerate(matches[:10]):
-            candidate = ref_data.get(match, {})
-            display_text = f"{idx + 1}. {candidate.get('Product Name', 'Unknown')}"
-            if score:
-                display_text += f" (Score: {score})"
-            matches_listbox.insert(END, display_text)
+        # Keep the rows shared with the previous item and replace the rest in one call each
+        matches, candidates, lines = item_display(current_item[0])
+        shown_matches[:] = matches
+        shown_candidates[:] = candidates
+        keep = 0
+        for shown, display_text in zip(shown_lines, lines):
+            if shown != display_text:
+                break
+            keep += 1
+        if keep < len(shown_lines):
+            matches_listbox.delete(keep, END)
+        if keep < len(lines):
+            matches_listbox.insert(END, *lines[keep:])
+        shown_lines[:] = lines
         
-        if matches_listbox.size() > 0:
+        matches_listbox.selection_clear(0, END)
+        if lines:
             matches_listbox.selection_set(0)
             update_preview()
     
@@ -212,9 +256,9 @@ def confirm_match_gui_batch(pending_items):
         selection = matches_listbox.curselection()
         if selection:
             idx = selection[0]
-            if idx < len(pending_items[current_item[0]][1]):
-                match, score = pending_items[current_item[0]][1][idx]
-                candidate = pending_items[current_item[0]][2].get(match, {})
+            if idx < len(shown_matches):
+                score = shown_matches[idx][1]
+                candidate = shown_candidates[idx]
                 
                 preview = f"Product Name: {candidate.get('Product Name', 'Unknown')}\n"
                 preview += f"Set Name: {candidate.get('Set Name', 'Unknown')}\n"
@@ -231,8 +275,8 @@ def confirm_match_gui_batch(pending_items):
         selection = matches_listbox.curselection()
         if selection:
             idx = selection[0]
-            if idx < len(pending_items[current_item[0]][1]):
-                results[current_item[0]] = pending_items[current_item[0]][1][idx][0]
+            if idx < len(shown_matches):
+                results[current_item[0]] = shown_matches[idx][0]
                 current_item[0] += 1
                 update_display()
     
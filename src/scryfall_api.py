@@ -1,42 +1,169 @@
+import json
 import time
+import threading
 import requests
-import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from pathlib import Path
 from typing import List, Dict, Optional, Any
-from .config import SCRYFALL_API_BASE, SCRYFALL_RATE_LIMIT
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import __version__
+from .config import (
+    SCRYFALL_API_BASE, SCRYFALL_RATE_LIMIT, SCRYFALL_CACHE_PATH, SCRYFALL_CACHE_MAX_AGE,
+    SCRYFALL_CACHE_MAX_ENTRIES
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class LRUCache:
+    """
+    Thread-safe mapping that drops its least recently used entries beyond maxsize.
+    
+    Membership tests count as a use, since callers read an entry right after
+    checking for it.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._data.move_to_end(key)
+            return True
+    
+    def __getitem__(self, key):
+        with self._lock:
+            value = self._data[key]
+            self._data.move_to_end(key)
+            return value
+    
+    def __setitem__(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    @property
+    def currsize(self) -> int:
+        return len(self._data)
+    
+    def setdefault(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+        self[key] = default
+        return default
+    
+    def items(self) -> List[tuple]:
+        with self._lock:
+            return list(self._data.items())
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
 
 last_scryfall_request = 0
-scryfall_cache = {}
+scryfall_cache = LRUCache(SCRYFALL_CACHE_MAX_ENTRIES)
 current_rate_limit = SCRYFALL_RATE_LIMIT
 consecutive_429s = 0
 last_429_time = 0
+cache_created = None
+MAX_BATCH_WORKERS = 8
+
+# Bumped when saved caches may hold entries this version must not reuse
+CACHE_FORMAT = 2
+
+# Lookups that failed for a transient reason (network error, 429, 5xx); they stay
+# cached for this run but are not saved, so the next run asks Scryfall again
+_transient_keys = set()
+
+# Guards the rate-limit state above, which batch worker threads share
+_rate_lock = threading.Lock()
+
+# Requests currently being fetched, keyed by call; concurrent duplicates wait on these
+_inflight: Dict[Any, '_InFlightRequest'] = {}
+_inflight_lock = threading.Lock()
+
+# One keep-alive session for all Scryfall calls; 429s are still handled by handle_rate_limit_response
+session = requests.Session()
+session.headers.update({'User-Agent': f'MTG-Card-Converter/{__version__}', 'Accept': 'application/json'})
+session.mount('https://', HTTPAdapter(
+    pool_connections=8, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+))
+
+
+def loads_json(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def decode_json(response: requests.Response) -> Any:
+    """Decode a Scryfall response body."""
+    return loads_json(response.content)
+
+
+def _cache_failure(cache_key, value, status_code=None) -> None:
+    """Cache an empty lookup result, persisting it only when Scryfall gave a definitive answer."""
+    scryfall_cache[cache_key] = value
+    if status_code not in (200, 404):
+        _transient_keys.add(cache_key)
 
 
 def adaptive_rate_limit():
     global last_scryfall_request, current_rate_limit, consecutive_429s, last_429_time
     
-    current_time = time.time()
-    elapsed = current_time - last_scryfall_request
-    
-    if consecutive_429s > 0 and current_time - last_429_time < 60:
-        backoff_multiplier = min(2 ** consecutive_429s, 8)
-        effective_limit = current_rate_limit * backoff_multiplier
-    else:
-        consecutive_429s = 0
-        effective_limit = current_rate_limit
-    
-    if elapsed < effective_limit:
-        sleep_time = effective_limit - elapsed
-        time.sleep(sleep_time)
+    # Each caller reserves the next free request slot under the lock, then sleeps until it
+    # outside the lock, so concurrent callers are spaced one rate-limit interval apart
+    with _rate_lock:
+        current_time = time.time()
+        
+        if consecutive_429s > 0 and current_time - last_429_time < 60:
+            backoff_multiplier = min(2 ** consecutive_429s, 8)
+            effective_limit = current_rate_limit * backoff_multiplier
+        else:
+            consecutive_429s = 0
+            effective_limit = current_rate_limit
+        
+        request_time = max(current_time, last_scryfall_request + effective_limit)
+        last_scryfall_request = request_time
     
-    last_scryfall_request = time.time()
+    if request_time > current_time:
+        time.sleep(request_time - current_time)
 
 
 def handle_rate_limit_response(response: requests.Response) -> None:
     global consecutive_429s, last_429_time, current_rate_limit
     
     if response.status_code == 429:
-        consecutive_429s += 1
-        last_429_time = time.time()
+        with _rate_lock:
+            consecutive_429s += 1
+            last_429_time = time.time()
+            attempts = consecutive_429s
         
         retry_after = response.headers.get('Retry-After')
         if retry_after:
@@ -47,12 +174,51 @@ def handle_rate_limit_response(response: requests.Response) -> None:
             except ValueError:
                 time.sleep(5)
         else:
-            wait_time = min(2 ** consecutive_429s, 30)
+            wait_time = min(2 ** attempts, 30)
             print(f"Rate limited - waiting {wait_time} seconds")
             time.sleep(wait_time)
     else:
-        if consecutive_429s == 0 and current_rate_limit > SCRYFALL_RATE_LIMIT:
-            current_rate_limit = max(current_rate_limit * 0.9, SCRYFALL_RATE_LIMIT)
+        with _rate_lock:
+            if consecutive_429s == 0 and current_rate_limit > SCRYFALL_RATE_LIMIT:
+                current_rate_limit = max(current_rate_limit * 0.9, SCRYFALL_RATE_LIMIT)
+
+
+class _InFlightRequest:
+    __slots__ = ('done', 'result')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+def _run_coalesced(key, fetch):
+    """Run fetch() once per key at a time; callers arriving meanwhile get the same result."""
+    with _inflight_lock:
+        request = _inflight.get(key)
+        owner = request is None
+        if owner:
+            request = _inflight[key] = _InFlightRequest()
+    
+    if not owner:
+        request.done.wait()
+        return request.result
+    
+    try:
+        request.result = fetch()
+        return request.result
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        request.done.set()
+
+
+def coalesce_requests(func):
+    """Share one in-flight request between concurrent calls with the same arguments."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        return _run_coalesced(key, lambda: func(*args, **kwargs))
+    return wrapper
 
 
 def batch_query_scryfall_collection(identifiers: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -62,10 +228,69 @@ def batch_query_scryfall_collection(identifiers: List[Dict[str, Any]]) -> Dict[s
     if len(identifiers) > 75:
         raise ValueError("Maximum 75 identifiers allowed per batch request")
     
-    cache_key = f"batch|{hash(json.dumps(identifiers, sort_keys=True))}"
+    # Canonical, process-independent key: the identifiers' fields, in sorted order
+    cache_key = ('batch', tuple(sorted(tuple(sorted(identifier.items())) for identifier in identifiers)))
     if cache_key in scryfall_cache:
         return scryfall_cache[cache_key]
     
+    # Identifiers already answered by single-card lookups are not sent again
+    cached_cards, cached_missing, pending = [], [], []
+    for identifier in identifiers:
+        item_key = _identifier_cache_key(identifier)
+        if item_key is None or item_key not in scryfall_cache or item_key in _transient_keys:
+            pending.append(identifier)
+        elif scryfall_cache[item_key] is None:
+            cached_missing.append(identifier)
+        else:
+            cached_cards.append(scryfall_cache[item_key])
+    
+    if len(pending) == len(identifiers):
+        return _run_coalesced(cache_key, lambda: _fetch_collection(identifiers, cache_key))
+    
+    result = batch_query_scryfall_collection(pending)
+    return {
+        'data': cached_cards + result.get('data', []),
+        'not_found': cached_missing + result.get('not_found', [])
+    }
+
+
+def _identifier_cache_key(identifier: Dict[str, Any]) -> Optional[str]:
+    """Single-card cache key for a collection identifier, or None if it has no equivalent."""
+    if 'id' in identifier:
+        return f"id|{identifier['id']}"
+    if identifier.get('name') and identifier.get('set'):
+        return f"{identifier['name']}|{identifier['set']}|{identifier.get('collector_number', '')}"
+    return None
+
+
+def _cache_collection_cards(identifiers: List[Dict[str, Any]], cards: List[Dict[str, Any]]) -> None:
+    """Store the cards a collection request found under their single-card cache keys."""
+    by_id = {}
+    by_print = {}
+    by_name = {}
+    for card in cards:
+        set_code = card.get('set', '').lower()
+        by_id[card.get('id', '').lower()] = card
+        by_print[(set_code, card.get('collector_number', ''))] = card
+        name = card.get('name', '').lower()
+        by_name.setdefault((name, set_code), card)
+        by_name.setdefault((name.split(' // ')[0], set_code), card)
+    
+    for identifier in identifiers:
+        item_key = _identifier_cache_key(identifier)
+        if item_key is None:
+            continue
+        if 'id' in identifier:
+            card = by_id.get(identifier['id'].lower())
+        elif identifier.get('collector_number'):
+            card = by_print.get((identifier['set'].lower(), identifier['collector_number']))
+        else:
+            card = by_name.get((identifier['name'].lower(), identifier['set'].lower()))
+        if card is not None:
+            scryfall_cache[item_key] = card
+
+
+def _fetch_collection(identifiers: List[Dict[str, Any]], cache_key) -> Dict[str, Any]:
     adaptive_rate_limit()
     
     try:
@@ -73,12 +298,13 @@ def batch_query_scryfall_collection(identifiers: List[Dict[str, Any]]) -> Dict[s
         headers = {'Content-Type': 'application/json'}
         payload = {'identifiers': identifiers}
         
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = session.post(url, json=payload, headers=headers, timeout=30)
         handle_rate_limit_response(response)
         
         if response.status_code == 200:
-            result = response.json()
+            result = decode_json(response)
             scryfall_cache[cache_key] = result
+            _cache_collection_cards(identifiers, result.get('data', []))
             return result
         else:
             print(f"Batch query failed with status {response.status_code}")
@@ -89,6 +315,8 @@ def batch_query_scryfall_collection(identifiers: List[Dict[str, Any]]) -> Dict[s
         return {'data': [], 'not_found': identifiers}
 
 
+@lru_cache(maxsize=4096)
+@coalesce_requests
 def query_scryfall_card(card_name, set_code, collector_number=None):
     cache_key = f"{card_name}|{set_code}|{collector_number or ''}"
     
@@ -100,11 +328,11 @@ def query_scryfall_card(card_name, set_code, collector_number=None):
     try:
         if collector_number:
             url = f"{SCRYFALL_API_BASE}/cards/{set_code}/{collector_number}"
-            response = requests.get(url, timeout=10)
+            response = session.get(url, timeout=10)
             handle_rate_limit_response(response)
             
             if response.status_code == 200:
-                card_data = response.json()
+                card_data = decode_json(response)
                 scryfall_cache[cache_key] = card_data
                 return card_data
         
@@ -113,11 +341,11 @@ def query_scryfall_card(card_name, set_code, collector_number=None):
             'format': 'json'
         }
         url = f"{SCRYFALL_API_BASE}/cards/search"
-        response = requests.get(url, params=params, timeout=10)
+        response = session.get(url, params=params, timeout=10)
         handle_rate_limit_response(response)
         
         if response.status_code == 200:
-            search_data = response.json()
+            search_data = decode_json(response)
             if search_data.get('total_cards', 0) > 0:
                 for card in search_data.get('data', []):
                     if card.get('name', '').lower() == card_name.lower():
@@ -127,15 +355,16 @@ def query_scryfall_card(card_name, set_code, collector_number=None):
                 scryfall_cache[cache_key] = first_card
                 return first_card
         
-        scryfall_cache[cache_key] = None
+        _cache_failure(cache_key, None, response.status_code)
         return None
     
     except Exception as e:
         print(f"Scryfall API error for {card_name} ({set_code}): {e}")
-        scryfall_cache[cache_key] = None
+        _cache_failure(cache_key, None)
         return None
 
 
+@coalesce_requests
 def get_scryfall_variants(card_name, set_code):
     cache_key = f"variants|{card_name}|{set_code}"
     
@@ -150,11 +379,11 @@ def get_scryfall_variants(card_name, set_code):
             'format': 'json'
         }
         url = f"{SCRYFALL_API_BASE}/cards/search"
-        response = requests.get(url, params=params, timeout=10)
+        response = session.get(url, params=params, timeout=10)
         handle_rate_limit_response(response)
         
         if response.status_code == 200:
-            search_data = response.json()
+            search_data = decode_json(response)
             variants = []
             for card in search_data.get('data', []):
                 if card.get('name', '').lower() == card_name.lower():
@@ -175,15 +404,17 @@ def get_scryfall_variants(card_name, set_code):
             scryfall_cache[cache_key] = variants
             return variants
         
-        scryfall_cache[cache_key] = []
+        _cache_failure(cache_key, [], response.status_code)
         return []
     
     except Exception as e:
         print(f"Scryfall variants error for {card_name} ({set_code}): {e}")
-        scryfall_cache[cache_key] = []
+        _cache_failure(cache_key, [])
         return []
 
 
+@lru_cache(maxsize=4096)
+@coalesce_requests
 def query_scryfall_by_id(scryfall_id):
     cache_key = f"id|{scryfall_id}"
     
@@ -194,56 +425,110 @@ def query_scryfall_by_id(scryfall_id):
     
     try:
         url = f"{SCRYFALL_API_BASE}/cards/{scryfall_id}"
-        response = requests.get(url, timeout=10)
+        response = session.get(url, timeout=10)
         handle_rate_limit_response(response)
         
         if response.status_code == 200:
-            card_data = response.json()
+            card_data = decode_json(response)
             scryfall_cache[cache_key] = card_data
             return card_data
         
-        scryfall_cache[cache_key] = None
+        _cache_failure(cache_key, None, response.status_code)
         return None
     
     except Exception as e:
         print(f"Scryfall ID query error for {scryfall_id}: {e}")
-        scryfall_cache[cache_key] = None
+        _cache_failure(cache_key, None)
         return None
 
 
+def query_collection_batches(identifier_batches: List[List[Dict[str, Any]]],
+                             max_workers: int = MAX_BATCH_WORKERS) -> List[Dict[str, Any]]:
+    """Run several /cards/collection requests concurrently; results keep the batch order."""
+    if len(identifier_batches) <= 1:
+        return [batch_query_scryfall_collection(batch) for batch in identifier_batches]
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(identifier_batches))) as executor:
+        return list(executor.map(batch_query_scryfall_collection, identifier_batches))
+
+
+def prefetch_cards_by_id(scryfall_ids: List[str], batch_size: int = 75) -> None:
+    """Warm the ID cache through /cards/collection so later ID lookups skip the network."""
+    pending = [i for i in dict.fromkeys(scryfall_ids) if f"id|{i}" not in scryfall_cache]
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    batch_results = query_collection_batches([[{'id': i} for i in batch] for batch in batches])
+    
+    for batch, batch_result in zip(batches, batch_results):
+        found = {card.get('id', '').lower(): card for card in batch_result.get('data', [])}
+        for scryfall_id in batch:
+            card = found.get(scryfall_id.lower())
+            if card:
+                scryfall_cache[f"id|{scryfall_id}"] = card
+
+
+def prefetch_cards_by_number(cards: List[tuple], batch_size: int = 75) -> None:
+    """
+    Warm the card cache for (card_name, set_code, collector_number) lookups.
+    
+    Only cards found by set and collector number are cached; the rest still go
+    through query_scryfall_card, which falls back to a name search.
+    """
+    pending = [card for card in dict.fromkeys(cards) if f"{card[0]}|{card[1]}|{card[2]}" not in scryfall_cache]
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    batch_results = query_collection_batches([
+        [{'set': set_code, 'collector_number': number} for _, set_code, number in batch] for batch in batches
+    ])
+    
+    for batch, batch_result in zip(batches, batch_results):
+        found = {(card.get('set', '').lower(), card.get('collector_number', '')): card
+                 for card in batch_result.get('data', [])}
+        for card_name, set_code, number in batch:
+            card = found.get((set_code.lower(), number))
+            if card:
+                scryfall_cache[f"{card_name}|{set_code}|{number}"] = card
+
+
 def clear_cache():
-    global scryfall_cache
+    global scryfall_cache, cache_created
     scryfall_cache.clear()
+    _transient_keys.clear()
+    cache_created = None
+    query_scryfall_card.cache_clear()
+    query_scryfall_by_id.cache_clear()
 
 
-def batch_process_cards(cards_data: List[Dict[str, str]], batch_size: int = 75) -> List[Dict[str, Any]]:
+def batch_process_cards(cards_data: List[Dict[str, str]], batch_size: int = 75,
+                        max_workers: int = MAX_BATCH_WORKERS) -> List[Dict[str, Any]]:
     """
     Process multiple cards using batching for efficiency.
     
+    Batches are sent concurrently from a thread pool; adaptive_rate_limit still
+    spaces the individual requests.
+    
     Args:
         cards_data: List of card data dicts with 'name', 'set_code', etc.
         batch_size: Number of cards per batch (max 75)
+        max_workers: Maximum number of batches in flight at once
     
     Returns:
         List of Scryfall card data
     """
     results = []
     
-    for i in range(0, len(cards_data), batch_size):
-        batch = cards_data[i:i + batch_size]
-        
-        # Convert card data to identifiers format
-        identifiers = []
-        for card in batch:
-            identifier = {'name': card.get('name', '')}
-            if card.get('set_code'):
-                identifier['set'] = card['set_code'].lower()
-            if card.get('collector_number'):
-                identifier['collector_number'] = card['collector_number']
-            identifiers.append(identifier)
-        
-        print(f"Processing batch {i // batch_size + 1} ({len(identifiers)} cards)")
-        batch_result = batch_query_scryfall_collection(identifiers)
+    # Convert card data to identifiers format
+    all_identifiers = [
+        {'name': card.get('name', ''),
+         **({'set': card['set_code'].lower()} if card.get('set_code') else {}),
+         **({'collector_number': card['collector_number']} if card.get('collector_number') else {})}
+        for card in cards_data
+    ]
+    identifier_batches = [all_identifiers[i:i + batch_size]
+                          for i in range(0, len(all_identifiers), batch_size)]
+    
+    batch_results = query_collection_batches(identifier_batches, max_workers)
+    
+    for number, (identifiers, batch_result) in enumerate(zip(identifier_batches, batch_results), 1):
+        print(f"Processing batch {number} ({len(identifiers)} cards)")
         
         # Add found cards to results
         for card in batch_result.get('data', []):
@@ -256,9 +541,61 @@ def batch_process_cards(cards_data: List[Dict[str, str]], batch_size: int = 75)
     return results
 
 
+def load_cache(path: Path = SCRYFALL_CACHE_PATH, max_age: float = SCRYFALL_CACHE_MAX_AGE) -> int:
+    """
+    Load Scryfall responses saved by an earlier run into scryfall_cache.
+    
+    A saved cache older than max_age seconds, or written in an older format, is
+    ignored, so new printings are picked up.
+    
+    Returns:
+        Number of entries loaded
+    """
+    global cache_created
+    
+    try:
+        with open(path, 'rb') as f:
+            saved = loads_json(f.read())
+        created, entries = saved['created'], saved['entries']
+    except FileNotFoundError:
+        return 0
+    except Exception as e:
+        print(f"Ignoring unreadable Scryfall cache {path}: {e}")
+        return 0
+    
+    if saved.get('format') != CACHE_FORMAT or time.time() - created > max_age:
+        return 0
+    
+    cache_created = created
+    for key, value in entries.items():
+        scryfall_cache.setdefault(key, value)
+    return len(entries)
+
+
+def save_cache(path: Path = SCRYFALL_CACHE_PATH) -> None:
+    """
+    Write scryfall_cache to disk as JSON so the next run can reuse it.
+    
+    Lookups that failed for a transient reason are left out, so they are retried.
+    Whole collection batches (tuple keys) are left out too; the cards they found
+    are saved under their single-card keys.
+    """
+    entries = {key: value for key, value in scryfall_cache.items()
+               if isinstance(key, str) and (value or key not in _transient_keys)}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(dumps_json({'format': CACHE_FORMAT, 'created': cache_created or time.time(), 'entries': entries}))
+        temp_path.replace(path)
+    except OSError as e:
+        print(f"Could not save Scryfall cache to {path}: {e}")
+
+
 def get_cache_stats():
     return {
-        'cache_size': len(scryfall_cache),
+        'cache_size': scryfall_cache.currsize,
+        'cache_max_size': scryfall_cache.maxsize,
         'rate_limit': current_rate_limit,
         'consecutive_429s': consecutive_429s,
         'last_429_time': last_429_time,
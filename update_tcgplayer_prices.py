@@ -1,19 +1,49 @@
 import argparse
 import sys
+from collections import defaultdict
 from typing import Any
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename
 from numpy import ndarray, dtype
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 FLOOR_PRICE = 0.25
+CHUNK_SIZE = 100_000
+
+
+# Computed columns get fixed dtypes so every chunk of a file parses the same way;
+# every other column is read as a string and written back exactly as it was
+INVENTORY_DTYPES = defaultdict(lambda: str, {
+    'TCG Market Price': 'float64',
+    'TCG Low Price': 'float64',
+    'Total Quantity': 'Int64',
+    'Add to Quantity': 'Int64',
+})
+
+# Only blank cells count as missing, so no passthrough text is read as NaN
+INVENTORY_NA_VALUES = {column: [''] for column in INVENTORY_DTYPES}
 
 
-def load_csv(path: Path) -> pd.DataFrame:
-    """Load inventory CSV into a DataFrame."""
-    return pd.read_csv(path)
+def iter_csv_chunks(path: Path, chunksize: int = CHUNK_SIZE):
+    """Load inventory CSV as DataFrames of at most `chunksize` rows."""
+    return pd.read_csv(path, dtype=INVENTORY_DTYPES, na_values=INVENTORY_NA_VALUES,
+                       keep_default_na=False, chunksize=chunksize, memory_map=True)
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _price_kernel(base: np.ndarray, out: np.ndarray) -> None:
+        # Same float64 arithmetic as the NumPy path below, fused into one parallel pass
+        for i in numba.prange(base.shape[0]):
+            price = base[i] * (1.3 if base[i] >= 15.0 else 1.5)
+            out[i] = price if price > FLOOR_PRICE else FLOOR_PRICE
+else:
+    _price_kernel = None
 
 
 def calculate_prices(df: pd.DataFrame) -> pd.Series:
@@ -25,20 +55,22 @@ def calculate_prices(df: pd.DataFrame) -> pd.Series:
     Enforce a minimum price floor.
     """
 
-    base = df['TCG Market Price'].fillna(df['TCG Low Price'].fillna(0.0))
-
-    price = pd.Series(index=base.index, dtype=float)
-
+    # Fill the base price in one float array instead of chaining Series.fillna copies
+    base = df['TCG Market Price'].to_numpy(dtype=np.float64, copy=True)
+    np.copyto(base, df['TCG Low Price'].to_numpy(dtype=np.float64), where=np.isnan(base))
+    np.copyto(base, 0.0, where=np.isnan(base))
 
-    mask_1_15 = (base >= 1.0) & (base < 15.0)
-    mask_ge15 = base >= 15.0
-    mask_other = ~(mask_1_15 | mask_ge15)
+    # Everything below $15 (including under $1) gets the same 150% multiplier.
+    if _price_kernel is not None:
+        price = np.empty_like(base)
+        _price_kernel(base, price)
+    else:
+        # The multiplier array is reused for the result to avoid extra temporaries.
+        price = np.where(base >= 15.0, 1.3, 1.5)
+        price *= base
+        np.maximum(price, FLOOR_PRICE, out=price)
 
-    price[mask_1_15] = base[mask_1_15] * 1.5
-    price[mask_ge15] = base[mask_ge15] * 1.3
-    price[mask_other] = base[mask_other] * 1.5
-
-    return price.clip(lower=FLOOR_PRICE)
+    return pd.Series(price, index=df.index)
 
 
 def update_quantities(df: pd.DataFrame) -> ndarray[tuple[Any, ...], dtype[Any]]:
@@ -46,11 +78,18 @@ def update_quantities(df: pd.DataFrame) -> ndarray[tuple[Any, ...], dtype[Any]]:
     Update 'Total Quantity' by adding 'Add to Quantity',
     but never drop below the original 'Total Quantity'.
     """
-    current = df['Total Quantity'].fillna(0).astype(int)
-    add = df.get('Add to Quantity', pd.Series(0, index=df.index)).fillna(0).astype(int)
+    current = df['Total Quantity'].fillna(0).to_numpy(dtype=np.int32)
+    add = df.get('Add to Quantity', pd.Series(0, index=df.index)).fillna(0).to_numpy(dtype=np.int32)
+
+    # Negative adjustments are ignored, which is the same as keeping max(total, current)
+    return current + np.maximum(add, 0)
 
-    total = current + add
-    return np.where(total >= current, total, current)
+
+def update_inventory(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the price and quantity updates to the inventory in place."""
+    df['TCG Marketplace Price'] = calculate_prices(df)
+    df['Total Quantity'] = update_quantities(df)
+    return df
 
 
 def main():
@@ -62,7 +101,11 @@ def main():
 
     input_path = Path(args.input) if args.input else None
     if not input_path or not input_path.exists():
-        Tk().withdraw()  
+        # Only the file picker needs tkinter, so command-line runs never import it
+        from tkinter import Tk
+        from tkinter.filedialog import askopenfilename
+
+        Tk().withdraw()
         chosen = askopenfilename(
             title="Select the input CSV file",
             filetypes=[("CSV files", "*.csv")]
@@ -72,10 +115,11 @@ def main():
             sys.exit(1)
         input_path = Path(chosen)
 
-    df = load_csv(input_path)
-    df['TCG Marketplace Price'] = calculate_prices(df)
-    df['Total Quantity'] = update_quantities(df)
-    df.to_csv(args.output, index=False)
+    # Stream the inventory so memory stays bounded by the chunk size
+    with iter_csv_chunks(input_path) as chunks:
+        for i, chunk in enumerate(chunks):
+            update_inventory(chunk).to_csv(args.output, index=False,
+                                           mode='w' if i == 0 else 'a', header=i == 0)
     print(f"Updated inventory saved to {args.output}")
 
 